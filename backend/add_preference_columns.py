@@ -7,7 +7,7 @@ Run this script to add the new preference columns to the User table
 import os
 import sys
 from sqlalchemy import text
-from app import app, db
+from app import app, db, get_existing_columns
 
 def add_preference_columns():
     """Add preference columns to User table if they don't exist"""
@@ -17,10 +17,9 @@ def add_preference_columns():
     with app.app_context():
         try:
             # Check if columns already exist
-            inspector = db.inspect(db.engine)
-            columns = [col['name'] for col in inspector.get_columns('user')]
+            columns = get_existing_columns(['user']).get('user', set())
             
-            print(f"📋 Existing columns: {columns}")
+            print(f"📋 Existing columns: {sorted(columns)}")
             
             # Add missing columns
             columns_to_add = []
@@ -40,24 +39,27 @@ def add_preference_columns():
                 
             print(f"🔧 Adding {len(columns_to_add)} new columns...")
             
-            # Execute ALTER TABLE statements
-            for alter_statement in columns_to_add:
-                full_statement = f"ALTER TABLE \"user\" {alter_statement}"
-                print(f"📝 Executing: {full_statement}")
-                
-                try:
+            # PostgreSQL adds every column in one ALTER TABLE; SQLite only accepts one ADD COLUMN per statement
+            if db.engine.dialect.name == 'postgresql':
+                statements = [f"ALTER TABLE \"user\" {', '.join(columns_to_add)}"]
+            else:
+                statements = [f"ALTER TABLE \"user\" {alter_statement}" for alter_statement in columns_to_add]
+            
+            # Execute ALTER TABLE statements in a single transaction
+            try:
+                for full_statement in statements:
+                    print(f"📝 Executing: {full_statement}")
                     db.session.execute(text(full_statement))
-                    db.session.commit()
-                    print(f"✅ Successfully added column")
-                except Exception as e:
-                    print(f"❌ Error adding column: {e}")
-                    db.session.rollback()
-                    return False
+                db.session.commit()
+                print(f"✅ Successfully added columns")
+            except Exception as e:
+                print(f"❌ Error adding columns: {e}")
+                db.session.rollback()
+                return False
             
             # Verify columns were added
-            inspector = db.inspect(db.engine)
-            new_columns = [col['name'] for col in inspector.get_columns('user')]
-            print(f"📋 Updated columns: {new_columns}")
+            new_columns = get_existing_columns(['user']).get('user', set())
+            print(f"📋 Updated columns: {sorted(new_columns)}")
             
             print("🎉 Preference columns added successfully!")
             return True
@@ -71,6 +73,10 @@ if __name__ == "__main__":
     print("🚀 Starting preference columns migration...")
     success = add_preference_columns()
     
+    # Close pooled connections explicitly so none linger in the pooler after this one-shot run
+    with app.app_context():
+        db.engine.dispose()
+    
     if success:
         print("✅ Migration completed successfully!")
         sys.exit(0)
@@ -5,51 +5,44 @@ Handles initialization and starts the Flask app
 """
 
 import os
+import socket
 import time
-import subprocess
 import sys
 
 # Don't import app here - wait until PostgreSQL is ready
 
+POSTGRES_HOST = 'postgres'
+POSTGRES_PORT = 5432
+
 def wait_for_postgres():
-    """Wait for PostgreSQL to be ready using pg_isready"""
+    """Wait for PostgreSQL to accept TCP connections"""
     max_attempts = 30
     for attempt in range(max_attempts):
         try:
-            # Use pg_isready to check if PostgreSQL is accepting connections
-            result = subprocess.run([
-                'pg_isready', '-h', 'postgres', '-p', '5432', '-U', 'chrome_user'
-            ], capture_output=True, text=True, timeout=5)
-            
-            if result.returncode == 0:
-                print(f"✅ PostgreSQL is ready!")
-                return True
-            else:
-                if attempt < max_attempts - 1:
-                    print(f"⏳ Waiting for PostgreSQL... ({attempt + 1}/{max_attempts})")
-                    time.sleep(2)
-                else:
-                    print(f"❌ PostgreSQL not ready after {max_attempts} attempts")
-                    return False
-        except Exception as e:
+            # Open and close a socket directly - no pg_isready process to spawn on every attempt
+            with socket.create_connection((POSTGRES_HOST, POSTGRES_PORT), timeout=1):
+                pass
+            print(f"✅ PostgreSQL is ready!")
+            return True
+        except OSError as e:
             if attempt < max_attempts - 1:
                 print(f"⏳ Waiting for PostgreSQL... ({attempt + 1}/{max_attempts}) - {e}")
-                time.sleep(2)
+                # Back off exponentially - a healthy database is usually up within a few hundred ms
+                time.sleep(min(0.05 * (2 ** attempt), 2.0))
             else:
                 print(f"❌ Failed to check PostgreSQL after {max_attempts} attempts: {e}")
                 return False
     return False
 
-def initialize_database():
+def initialize_database(app, db, create_tables):
     """Initialize database tables"""
     try:
         print("🔧 Initializing database tables...")
         
-        # Import app after PostgreSQL is ready
-        from app import app, db
+        # A single schema_version lookup when the schema is already current
+        create_tables()
         
         with app.app_context():
-            db.create_all()
             
             # Verify tables were created
             from sqlalchemy import text
@@ -68,29 +61,39 @@ def initialize_database():
 
 def main():
     """Main startup function"""
-    print("🐳 Chrome Extension Backend - Docker Startup")
-    print("=" * 50)
+    # The reloader re-runs this script in a child process to serve requests; the parent
+    # has already waited for PostgreSQL and initialized the schema, so the child skips both
+    is_reloader_child = os.environ.get('WERKZEUG_RUN_MAIN') == 'true'
     
-    # Wait for PostgreSQL
-    print("🔍 Checking PostgreSQL connection...")
-    if not wait_for_postgres():
-        print("❌ PostgreSQL connection failed. Exiting.")
-        sys.exit(1)
+    if not is_reloader_child:
+        print("🐳 Chrome Extension Backend - Docker Startup")
+        print("=" * 50)
+        
+        # Wait for PostgreSQL
+        print("🔍 Checking PostgreSQL connection...")
+        if not wait_for_postgres():
+            print("❌ PostgreSQL connection failed. Exiting.")
+            sys.exit(1)
     
-    # Initialize database
-    if not initialize_database():
-        print("❌ Database initialization failed. Exiting.")
+    # Import the app once, now that PostgreSQL is ready, and share it with every step below
+    try:
+        from app import app, db, create_tables
+    except Exception as e:
+        print(f"❌ Failed to import app: {e}")
         sys.exit(1)
     
-    print("✅ Startup initialization complete!")
-    print("🚀 Starting Flask development server...")
-    print("=" * 50)
+    if not is_reloader_child:
+        # Initialize database
+        if not initialize_database(app, db, create_tables):
+            print("❌ Database initialization failed. Exiting.")
+            sys.exit(1)
+        
+        print("✅ Startup initialization complete!")
+        print("🚀 Starting Flask development server...")
+        print("=" * 50)
     
     # Start Flask app with hot reload
     try:
-        # Import app here after all checks are done
-        from app import app
-        
         app.run(
             host='0.0.0.0',
             port=8000,
@@ -106,4 +109,4 @@ def main():
         sys.exit(1)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
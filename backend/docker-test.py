@@ -8,40 +8,53 @@ import sys
 import time
 import requests
 import json
+from concurrent.futures import ThreadPoolExecutor
 
 def run_command(cmd, description):
-    """Run a command and return success status"""
+    """Run a command and return (success, output, lines to print)"""
     try:
         result = subprocess.run(cmd, shell=True, capture_output=True, text=True, timeout=30)
         if result.returncode == 0:
-            print(f"✅ {description}")
-            return True, result.stdout.strip()
+            return True, result.stdout.strip(), [f"✅ {description}"]
         else:
-            print(f"❌ {description}")
-            print(f"   Error: {result.stderr.strip()}")
-            return False, result.stderr.strip()
+            return False, result.stderr.strip(), [f"❌ {description}", f"   Error: {result.stderr.strip()}"]
     except subprocess.TimeoutExpired:
-        print(f"⏰ {description} (timeout)")
-        return False, "Command timed out"
+        return False, "Command timed out", [f"⏰ {description} (timeout)"]
     except Exception as e:
-        print(f"❌ {description}")
-        print(f"   Exception: {e}")
-        return False, str(e)
+        return False, str(e), [f"❌ {description}", f"   Exception: {e}"]
 
 def test_http_endpoint(url, description, timeout=10):
-    """Test HTTP endpoint"""
+    """Test HTTP endpoint and return (success, body, lines to print)"""
     try:
         response = requests.get(url, timeout=timeout)
         if response.status_code == 200:
-            print(f"✅ {description} (Status: {response.status_code})")
-            return True, response.json() if 'application/json' in response.headers.get('content-type', '') else response.text
+            body = response.json() if 'application/json' in response.headers.get('content-type', '') else response.text
+            return True, body, [f"✅ {description} (Status: {response.status_code})"]
         else:
-            print(f"❌ {description} (Status: {response.status_code})")
-            return False, f"HTTP {response.status_code}"
+            return False, f"HTTP {response.status_code}", [f"❌ {description} (Status: {response.status_code})"]
     except requests.exceptions.RequestException as e:
-        print(f"❌ {description}")
-        print(f"   Error: {e}")
-        return False, str(e)
+        return False, str(e), [f"❌ {description}", f"   Error: {e}"]
+
+def wait_for_http(url, max_wait=5):
+    """Poll url until it answers at all, giving up after max_wait seconds"""
+    deadline = time.monotonic() + max_wait
+    while time.monotonic() < deadline:
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.exceptions.RequestException:
+            time.sleep(0.25)
+
+def test_app_endpoint(url, description):
+    """Test a Flask app endpoint once the app is answering requests"""
+    wait_for_http("http://localhost:8000/")
+    return test_http_endpoint(url, description)
+
+def report(future):
+    """Print a finished check's lines and return its (success, output)"""
+    success, output, lines = future.result()
+    print("\n".join(lines))
+    return success, output
 
 def main():
     """Run all tests"""
@@ -50,17 +63,33 @@ def main():
     
     tests = []
     
+    # The checks don't depend on each other, so run them all at once and report in order -
+    # the suite then takes about as long as its slowest check
+    executor = ThreadPoolExecutor(max_workers=8)
+    docker_version = executor.submit(run_command, "docker --version", "Docker installation")
+    compose_version = executor.submit(run_command, "docker-compose --version", "Docker Compose")
+    container_status = executor.submit(run_command, "docker-compose ps", "Container status check")
+    postgres_check = executor.submit(
+        run_command,
+        'docker-compose exec -T postgres psql -U chrome_user -d chrome_extension -c "SELECT 1;"',
+        "PostgreSQL connection test"
+    )
+    pgadmin_check = executor.submit(test_http_endpoint, "http://localhost:5050", "pgAdmin interface", timeout=15)
+    
+    health_check = executor.submit(test_app_endpoint, "http://localhost:8000/api/health", "Flask app health check")
+    test_endpoint_check = executor.submit(test_app_endpoint, "http://localhost:8000/api/test", "Flask test endpoint")
+    
     # Test 1: Docker availability
     print("\n🔍 Testing Docker Environment:")
-    success, output = run_command("docker --version", "Docker installation")
+    success, output = report(docker_version)
     tests.append(("Docker Installation", success))
     
-    success, output = run_command("docker-compose --version", "Docker Compose")
+    success, output = report(compose_version)
     tests.append(("Docker Compose", success))
     
     # Test 2: Container status
     print("\n🐳 Testing Container Status:")
-    success, output = run_command("docker-compose ps", "Container status check")
+    success, output = report(container_status)
     tests.append(("Container Status", success))
     
     if success and 'chrome_ext_app' in output:
@@ -73,45 +102,42 @@ def main():
     # Test 3: Service endpoints
     print("\n🌐 Testing Service Endpoints:")
     
-    # Wait a moment for services to be ready
-    print("⏳ Waiting for services to be ready...")
-    time.sleep(5)
-    
-    success, data = test_http_endpoint("http://localhost:8000/api/health", "Flask app health check")
+    success, data = report(health_check)
     tests.append(("Flask Health Check", success))
     
+    # The health check already runs SELECT 1 through the app's own engine
+    app_db_status = None
     if success:
         try:
             health_data = data if isinstance(data, dict) else json.loads(data)
             db_status = health_data.get('services', {}).get('database', {}).get('status')
             stripe_status = health_data.get('services', {}).get('stripe', {}).get('status')
             
+            app_db_status = db_status
             print(f"   📊 Database: {db_status}")
             print(f"   💳 Stripe: {stripe_status}")
         except:
             print("   📊 Health check response received")
     
-    success, data = test_http_endpoint("http://localhost:8000/api/test", "Flask test endpoint")
+    success, data = report(test_endpoint_check)
     tests.append(("Flask Test Endpoint", success))
     
-    success, data = test_http_endpoint("http://localhost:5050", "pgAdmin interface", timeout=15)
+    success, data = report(pgadmin_check)
     tests.append(("pgAdmin Interface", success))
     
     # Test 4: Database connection
     print("\n🗄️ Testing Database Connection:")
-    success, output = run_command(
-        'docker-compose exec -T postgres psql -U chrome_user -d chrome_extension -c "SELECT 1;"',
-        "PostgreSQL connection test"
-    )
+    success, output = report(postgres_check)
     tests.append(("PostgreSQL Connection", success))
     
-    # Test 5: App database connectivity
-    success, output = run_command(
-        'docker-compose exec -T app python -c "from app import db; from sqlalchemy import text; db.session.execute(text(\'SELECT 1\')); print(\'Database connected!\')"',
-        "Flask app database connection"
-    )
+    # Test 5: App database connectivity - read from the health check rather than starting a
+    # second interpreter in the app container just to import the app and run SELECT 1
+    success = app_db_status == 'healthy'
+    print(f"{'✅' if success else '❌'} Flask app database connection")
     tests.append(("Flask Database Connection", success))
     
+    executor.shutdown()
+    
     # Summary
     print("\n📋 Test Results Summary:")
     print("=" * 50)
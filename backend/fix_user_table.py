@@ -15,20 +15,18 @@ def fix_user_table():
         from app import app, db
         
         with app.app_context():
-            # Drop and recreate tables (for development only)
-            print("🔧 Dropping and recreating tables...")
-            db.drop_all()
-            db.create_all()
-            print("✅ Tables recreated successfully!")
-            
-            # Show created tables
             from sqlalchemy import text
-            result = db.session.execute(text("SELECT table_name FROM information_schema.tables WHERE table_schema = 'public'"))
-            tables = [row[0] for row in result]
             
-            print("📋 Tables created:")
-            for table in tables:
-                print(f"   - {table}")
+            # Widen the picture column in place instead of dropping every table and its data
+            result = db.session.execute(text("SELECT data_type FROM information_schema.columns WHERE table_name = 'user' AND column_name = 'picture'"))
+            picture_type = result.scalar()
+            if picture_type == 'character varying':
+                print("🔧 Changing user.picture to TEXT...")
+                db.session.execute(text('ALTER TABLE "user" ALTER COLUMN picture TYPE TEXT'))
+                db.session.commit()
+                print("✅ user.picture column widened")
+            else:
+                print(f"✅ user.picture is already {picture_type or 'missing'} - nothing to change")
                 
             # Show user table structure
             result = db.session.execute(text("SELECT column_name, data_type, character_maximum_length FROM information_schema.columns WHERE table_name = 'user' ORDER BY ordinal_position"))
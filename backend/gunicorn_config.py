@@ -1,6 +1,7 @@
 """
 Gunicorn configuration file for Railway deployment
 """
+import multiprocessing
 import os
 
 # Get port from environment
@@ -9,9 +10,13 @@ port = os.environ.get('PORT', '8000')
 # Server socket
 bind = f"0.0.0.0:{port}"
 
-# Worker processes
-workers = 1
-worker_class = 'sync'
+# Worker processes - requests spend most of their time waiting on OpenAI/Stripe,
+# so run several threaded workers instead of one blocking sync worker.
+# Capped by default because containers often report the host's CPU count and
+# every worker holds its own Postgres pool; set WEB_CONCURRENCY to override.
+workers = int(os.environ.get('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, 4)))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
 worker_connections = 1000
 timeout = 120
 keepalive = 2
@@ -19,12 +24,16 @@ keepalive = 2
 # Logging
 accesslog = '-'
 errorlog = '-'
-loglevel = 'info'
+# Warnings and errors only in production - set GUNICORN_LOG_LEVEL=info for more detail
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'warning')
 
 # Process naming
 proc_name = 'trace-backend'
 
 # Server mechanics
+# Load the app once in the master so create_tables() runs a single time, not once per worker.
+# With a release step running `flask --app app init-schema`, set AUTO_INIT_SCHEMA=false to skip it at boot.
+preload_app = True
 daemon = False
 pidfile = None
 umask = 0
@@ -36,6 +45,12 @@ tmp_upload_dir = None
 keyfile = None
 certfile = None
 
+def post_fork(server, worker):
+    """Drop database connections inherited from the master so each worker opens its own"""
+    from app import app, db
+    with app.app_context():
+        db.engine.dispose(close=False)
+
 print(f"📍 Gunicorn starting on port {port}")
 print(f"🔗 Bind address: {bind}")
-print(f"⚙️ Workers: {workers}")
\ No newline at end of file
+print(f"⚙️ Workers: {workers} x {threads} threads")
\ No newline at end of file
@@ -27,7 +27,7 @@ def initialize_database():
     # For other environments or Railway with external DB URL, proceed with initialization
     try:
         # Import app after environment check
-        from app import app, db
+        from app import app, db, create_tables
         
         with app.app_context():
             if database_url.startswith('postgresql://') or database_url.startswith('postgres://'):
@@ -37,9 +37,9 @@ def initialize_database():
             else:
                 print("🗄️ Initializing database...")
             
-            # Create all tables
+            # Create missing tables and columns - a single schema_version lookup when already current
             print("🔧 Creating database tables...")
-            db.create_all()
+            create_tables()
             print("✅ Database tables created successfully!")
             
             # Show created tables
@@ -10,7 +10,7 @@ import sys
 # Add the backend directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from app import app, db
+from app import app, db, create_tables, get_existing_columns
 from sqlalchemy import text
 
 def run_migration():
@@ -20,18 +20,13 @@ def run_migration():
     
     with app.app_context():
         try:
-            # Create all tables first (in case they don't exist)
-            db.create_all()
-            print("✅ Database tables created/verified")
+            # Create all tables first (in case they don't exist) - a no-op when
+            # importing app already verified the current schema
+            create_tables()
             
             # Check existing columns
-            result = db.session.execute(text("""
-                SELECT column_name 
-                FROM information_schema.columns 
-                WHERE table_name = 'user'
-            """))
-            existing_columns = [row[0] for row in result]
-            print(f"📋 Existing columns: {existing_columns}")
+            existing_columns = get_existing_columns(['user']).get('user', set())
+            print(f"📋 Existing columns: {sorted(existing_columns)}")
             
             # Add missing preference columns
             migrations = []
@@ -39,38 +34,39 @@ def run_migration():
             if 'summary_style' not in existing_columns:
                 migrations.append({
                     'name': 'summary_style',
-                    'sql': 'ALTER TABLE "user" ADD COLUMN summary_style VARCHAR(20) DEFAULT \'eli8\''
+                    'sql': 'ADD COLUMN summary_style VARCHAR(20) DEFAULT \'eli8\''
                 })
             
             if 'auto_summarize_enabled' not in existing_columns:
                 migrations.append({
                     'name': 'auto_summarize_enabled', 
-                    'sql': 'ALTER TABLE "user" ADD COLUMN auto_summarize_enabled BOOLEAN DEFAULT false'
+                    'sql': 'ADD COLUMN auto_summarize_enabled BOOLEAN DEFAULT false'
                 })
             
             if 'notifications_enabled' not in existing_columns:
                 migrations.append({
                     'name': 'notifications_enabled',
-                    'sql': 'ALTER TABLE "user" ADD COLUMN notifications_enabled BOOLEAN DEFAULT true'
+                    'sql': 'ADD COLUMN notifications_enabled BOOLEAN DEFAULT true'
                 })
             
             if not migrations:
                 print("✅ All preference columns already exist - no migration needed!")
                 return True
             
-            # Execute migrations
-            for migration in migrations:
-                print(f"🔧 Adding column: {migration['name']}")
-                print(f"📝 SQL: {migration['sql']}")
-                
-                try:
-                    db.session.execute(text(migration['sql']))
-                    db.session.commit()
-                    print(f"✅ Successfully added {migration['name']}")
-                except Exception as e:
-                    print(f"❌ Error adding {migration['name']}: {e}")
-                    db.session.rollback()
-                    return False
+            # Execute migrations as one multi-column ALTER TABLE in a single transaction
+            column_names = ', '.join(migration['name'] for migration in migrations)
+            alter_sql = 'ALTER TABLE "user" ' + ', '.join(migration['sql'] for migration in migrations)
+            print(f"🔧 Adding columns: {column_names}")
+            print(f"📝 SQL: {alter_sql}")
+            
+            try:
+                db.session.execute(text(alter_sql))
+                db.session.commit()
+                print(f"✅ Successfully added {column_names}")
+            except Exception as e:
+                print(f"❌ Error adding {column_names}: {e}")
+                db.session.rollback()
+                return False
             
             # Verify final state
             result = db.session.execute(text("""
@@ -95,4 +91,7 @@ def run_migration():
 
 if __name__ == "__main__":
     success = run_migration()
+    # Close pooled connections explicitly so none linger in the pooler after this one-shot run
+    with app.app_context():
+        db.engine.dispose()
     sys.exit(0 if success else 1)
\ No newline at end of file
@@ -0,0 +1,5 @@
+-- Migration to index API usage lookups by user
+-- Run this in your Railway PostgreSQL database
+
+-- Admin usage aggregates and recent-activity queries filter by user_id and order/range on created_at
+CREATE INDEX IF NOT EXISTS idx_api_usage_user_created ON api_usage(user_id, created_at);
@@ -42,7 +42,8 @@ def start_docker_services():
             except subprocess.CalledProcessError:
                 pass
                 
-            time.sleep(1)
+            # Back off exponentially - a healthy database is usually up within a few hundred ms
+            time.sleep(min(0.05 * (2 ** attempt), 2.0))
             print(f"   Attempt {attempt + 1}/{max_attempts}...")
         
         print("❌ PostgreSQL failed to start within timeout")
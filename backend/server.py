@@ -4,127 +4,398 @@ Production HTTP server for Chrome extension backend
 Deploy to Railway with: railway up
 """
 
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from html.parser import HTMLParser
+import hashlib
 import json
-import urllib.request
-import ssl
+import logging
+import os
+import time
 import re
+import signal
+import threading
 from urllib.parse import urlparse
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Per-request detail is logged at debug so it costs nothing unless LOG_LEVEL=DEBUG
+logger = logging.getLogger('trace.server')
+logger.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+
+# orjson is optional - fall back to the stdlib json module without it
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# lxml parses pages much faster when installed; the stdlib parser below is the fallback
+try:
+    import lxml.etree
+    import lxml.html
+except ImportError:
+    lxml = None
+
+# One pooled session for page fetches and OpenAI calls - keeps TLS connections alive
+# between requests instead of handshaking with api.openai.com for every call
+http_session = requests.Session()
+http_session.mount('https://', HTTPAdapter(pool_connections=10, pool_maxsize=100))
+http_session.mount('http://', HTTPAdapter(pool_connections=10, pool_maxsize=100))
+http_session.headers.update({
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+})
+
+def dumps_json(obj):
+    """Serialize obj to UTF-8 JSON bytes, with orjson when available"""
+    return orjson.dumps(obj) if orjson else json.dumps(obj).encode('utf-8')
+
+def loads_json(data):
+    """Parse JSON from bytes or str, with orjson when available"""
+    return orjson.loads(data) if orjson else json.loads(data)
+
+# The extension only posts a URL, action and API key - anything bigger is rejected unread
+MAX_REQUEST_BODY = 64 * 1024
+
+# The test endpoints always return the same bodies - serialize them once at import
+TEST_GET_BODY = dumps_json({
+    'success': True,
+    'message': 'GET request successful!',
+    'method': 'GET',
+    'endpoint': '/api/test-get',
+    'timestamp': '2025-01-01T00:00:00Z'
+})
+TEST_POST_BODY = dumps_json({
+    'success': True,
+    'message': 'Railway backend is working!',
+    'timestamp': '2025-01-01T00:00:00Z'
+})
+
+WHITESPACE_RE = re.compile(r'\s+')
+# lxml refuses str input that carries an <?xml ... encoding=...?> declaration (XHTML pages)
+XML_DECLARATION_RE = re.compile(r'^\s*<\?xml[^>]*\?>')
+
+class TextExtractor(HTMLParser):
+    """Collect a page's text in one pass, skipping the contents of script and style elements"""
+    SKIPPED_TAGS = ('script', 'style')
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIPPED_TAGS:
+            self.skip_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIPPED_TAGS and self.skip_depth:
+            self.skip_depth -= 1
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.parts.append(data)
+
+# Only the start of a page's text is sent to OpenAI - the first 200KB of HTML is plenty to produce it
+PAGE_TEXT_LIMIT = 5000
+PAGE_HTML_MAX_BYTES = 200 * 1024
+PAGE_READ_CHUNK = 8192
+
+def extract_text(html, limit=PAGE_TEXT_LIMIT):
+    """Return up to limit characters of an HTML document's visible text with whitespace collapsed"""
+    if lxml is not None:
+        tree = lxml.html.fromstring(XML_DECLARATION_RE.sub('', html, count=1))
+        lxml.etree.strip_elements(tree, 'script', 'style', lxml.etree.Comment, with_tail=False)
+        parts = tree.itertext()
+    else:
+        extractor = TextExtractor()
+        extractor.feed(html)
+        extractor.close()
+        parts = extractor.parts
+    
+    # Collapse each text node separately and stop once the limit is reached,
+    # instead of joining and collapsing the whole page only to slice it
+    pieces = []
+    length = 0
+    for part in parts:
+        piece = WHITESPACE_RE.sub(' ', part).strip()
+        if piece:
+            pieces.append(piece)
+            length += len(piece) + 1
+            if length > limit:
+                break
+    return ' '.join(pieces)[:limit]
+
+# Recent OpenAI results keyed by a hash of action + API key + page content,
+# so a repeat request for an unchanged page skips the OpenAI call
+SUMMARY_CACHE_MAX = 256
+SUMMARY_CACHE_TTL = 3600
+_summary_cache = OrderedDict()
+_summary_cache_lock = threading.Lock()
+
+def get_cached_result(key):
+    """Return a cached OpenAI result, or None if missing or expired"""
+    with _summary_cache_lock:
+        entry = _summary_cache.get(key)
+        if not entry:
+            return None
+        if time.monotonic() - entry[1] > SUMMARY_CACHE_TTL:
+            del _summary_cache[key]
+            return None
+        _summary_cache.move_to_end(key)
+        return entry[0]
+
+def cache_result(key, result):
+    """Store an OpenAI result, evicting the least recently used entry when full"""
+    with _summary_cache_lock:
+        _summary_cache[key] = (result, time.monotonic())
+        _summary_cache.move_to_end(key)
+        while len(_summary_cache) > SUMMARY_CACHE_MAX:
+            _summary_cache.popitem(last=False)
+
+# Cleaned text of recently fetched pages with their validators, so a refetch can be a
+# conditional GET that skips the download and cleaning when the page hasn't changed
+PAGE_CACHE_MAX = 512
+_page_cache = OrderedDict()
+_page_cache_lock = threading.Lock()
+
+def get_cached_page(url):
+    """Return (etag, last_modified, text) for a previously fetched page, or None"""
+    with _page_cache_lock:
+        entry = _page_cache.get(url)
+        if entry:
+            _page_cache.move_to_end(url)
+        return entry
+
+def cache_page(url, etag, last_modified, text):
+    """Store a page's cleaned text and validators, evicting the least recently used page when full"""
+    with _page_cache_lock:
+        _page_cache[url] = (etag, last_modified, text)
+        _page_cache.move_to_end(url)
+        while len(_page_cache) > PAGE_CACHE_MAX:
+            _page_cache.popitem(last=False)
+
+# The system messages and sampling settings never change - build them once at import;
+# each call only adds its user message
+SUMMARIZE_SYSTEM_MESSAGE = {
+    'role': 'system',
+    'content': '''You are an expert at identifying web page types and summarizing articles. First determine if the given content is a single article/blog post or a homepage/index/listing page.
+                        
+Article indicators:
+- Has a clear title and author
+- Contains a coherent narrative or argument
+- Focuses on a single topic
+- Has substantial body text
+- Includes publication date
+
+Non-article indicators:
+- Lists of links to other pages
+- Multiple unrelated topics
+- Navigation menus dominate
+- Homepage or landing page
+- Category/tag listing page
+- Search results page
+
+If it is an article, also write a brief 2-3 sentence summary that captures the main purpose and key information of the page.
+
+Respond with JSON: {"is_article": true/false, "confidence": 0-100, "page_type": "article|homepage|listing|navigation|other", "reason": "brief explanation", "summary": "2-3 sentence summary, or an empty string if not an article"}'''
+}
+SUMMARIZE_REQUEST = {
+    'model': 'gpt-3.5-turbo',
+    'temperature': 0.3,
+    'max_tokens': 300
+}
+
+ANALYZE_SYSTEM_MESSAGE = {
+    'role': 'system',
+    'content': 'You are a helpful assistant that analyzes web page content. When given page text, identify and list the top 5 sentences that best convey the purpose and main message of the page. Format your response as a numbered list with just the sentences, no additional commentary.'
+}
+ANALYZE_REQUEST = {
+    'model': 'gpt-3.5-turbo',
+    'temperature': 0.3,
+    'max_tokens': 300
+}
+
+def post_openai_chat(data, api_key):
+    """POST a chat completion request to OpenAI and return the parsed JSON response"""
+    response = http_session.post(
+        'https://api.openai.com/v1/chat/completions',
+        data=dumps_json(data),
+        headers={'Authorization': f'Bearer {api_key}', 'Content-Type': 'application/json'},
+        timeout=30
+    )
+    if response.status_code != 200:
+        raise Exception(f'HTTP Error {response.status_code}: {response.reason}')
+    return loads_json(response.content)
+
+def stream_openai_chat(data, api_key):
+    """POST a streamed chat completion request to OpenAI and yield the content deltas as they arrive
+
+    Raises if the stream ends without OpenAI's [DONE] marker, so truncated output is never treated as complete.
+    """
+    with http_session.post(
+        'https://api.openai.com/v1/chat/completions',
+        data=dumps_json({**data, 'stream': True}),
+        headers={'Authorization': f'Bearer {api_key}', 'Content-Type': 'application/json'},
+        stream=True,
+        timeout=60
+    ) as response:
+        if response.status_code != 200:
+            raise Exception(f'HTTP Error {response.status_code}: {response.reason}')
+        for line in response.iter_lines():
+            if not line.startswith(b'data: '):
+                continue
+            chunk = line[len(b'data: '):]
+            if chunk == b'[DONE]':
+                return
+            delta = loads_json(chunk)['choices'][0]['delta'].get('content')
+            if delta:
+                yield delta
+    raise Exception('Stream ended before completion')
 
 class CORSHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps the extension's connection open between requests; every
+    # response must then carry a Content-Length or close the connection
+    protocol_version = 'HTTP/1.1'
+
     def _set_cors_headers(self):
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
         self.send_header('Access-Control-Max-Age', '86400')
 
+    def _send_json(self, payload):
+        """Send a complete 200 JSON response with its Content-Length"""
+        self._send_json_body(dumps_json(payload))
+
+    def _send_json_body(self, body):
+        """Send an already serialized 200 JSON response body"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self._set_cors_headers()
+        self.end_headers()
+        self.wfile.write(body)
+
     def do_OPTIONS(self):
         self.send_response(200)
+        self.send_header('Content-Length', '0')
         self._set_cors_headers()
         self.end_headers()
 
     def do_GET(self):
         if self.path == '/api/test-get':
+            self._send_json_body(TEST_GET_BODY)
+        else:
+            self.send_error(404, 'Not found')
+
+    def _write_event(self, payload):
+        """Write one server-sent event and flush it to the client immediately"""
+        if not self.stream_started:
+            # The stream's length isn't known up front, so it ends by closing the connection
             self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Connection', 'close')
             self._set_cors_headers()
             self.end_headers()
-            
-            response = {
-                'success': True,
-                'message': 'GET request successful!',
-                'method': 'GET',
-                'endpoint': '/api/test-get',
-                'timestamp': '2025-01-01T00:00:00Z'
-            }
-            self.wfile.write(json.dumps(response).encode('utf-8'))
+            self.stream_started = True
+        self.wfile.write(b"data: " + dumps_json(payload) + b"\n\n")
+        self.wfile.flush()
+
+    def _write_result(self, payload):
+        """Send the JSON response, or the final event of a streamed response"""
+        if self.streaming:
+            self._write_event(payload)
+            self.wfile.write(b"data: [DONE]\n\n")
         else:
-            self.send_error(404, 'Not found')
+            self._send_json(payload)
 
     def do_POST(self):
         if self.path == '/api/summarize' or self.path == '/api/test':
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self._set_cors_headers()
-            self.end_headers()
-            
             # Read request body
-            content_length = int(self.headers['Content-Length'])
+            try:
+                content_length = int(self.headers.get('Content-Length') or 0)
+            except ValueError:
+                content_length = 0
+            if content_length <= 0:
+                self.send_error(400, 'Request body required')
+                return
+            if content_length > MAX_REQUEST_BODY:
+                self.send_error(413, 'Payload too large')
+                return
             post_data = self.rfile.read(content_length)
             
             try:
-                request_data = json.loads(post_data.decode('utf-8'))
-                print(f"Received request data: {request_data}")
+                request_data = loads_json(post_data)
+                # Never log the body itself - it carries the user's OpenAI API key
+                logger.debug("Received request fields: %s", sorted(request_data))
+                
+                # Analyze requests can opt in to receiving tokens as server-sent events while they are generated
+                self.streaming = (
+                    self.path == '/api/summarize'
+                    and bool(request_data.get('stream'))
+                    and request_data.get('action') == 'analyze'
+                )
+                self.stream_started = False
                 
                 if self.path == '/api/test':
                     # Simple test response
-                    response = {
-                        'success': True,
-                        'message': 'Railway backend is working!',
-                        'timestamp': '2025-01-01T00:00:00Z'
-                    }
-                    self.wfile.write(json.dumps(response).encode('utf-8'))
+                    self._send_json_body(TEST_POST_BODY)
                 
                 elif self.path == '/api/summarize':
-                    print(f"\n{'='*50}")
-                    print(f"📝 SUMMARIZE REQUEST RECEIVED")
-                    print(f"{'='*50}")
-                    
                     url = request_data.get('url')
                     action = request_data.get('action', 'summarize')
                     api_key = request_data.get('apiKey')
                     
-                    print(f"🌐 URL: {url}")
-                    print(f"⚙️  Action: {action}")
-                    print(f"🔑 API Key present: {bool(api_key)}")
-                    print(f"📏 API Key length: {len(api_key) if api_key else 0}")
-                    print(f"🕒 Timestamp: {self.date_time_string()}")
+                    logger.debug("📝 Summarize request: url=%s action=%s api_key_present=%s", url, action, bool(api_key))
                     
                     if not url or not api_key:
-                        print(f"❌ ERROR: Missing required data")
-                        print(f"   - URL: {'✅' if url else '❌'} {url}")
-                        print(f"   - API Key: {'✅' if api_key else '❌'}")
+                        logger.info("❌ Missing required data: url=%s api_key_present=%s", url, bool(api_key))
                         self.send_error(400, 'URL and API key required')
                         return
                     
                     # Fetch page content and call OpenAI
                     try:
-                        print(f"🔄 Starting content fetch for: {url}")
-                        
                         # Fetch the actual page content
                         page_content = self.fetch_page_content(url)
                         if not page_content:
-                            print(f"❌ Failed to fetch page content")
+                            logger.info("❌ Failed to fetch page content: %s", url)
                             error_response = {'success': False, 'error': 'Unable to fetch page content'}
-                            self.wfile.write(json.dumps(error_response).encode('utf-8'))
+                            self._write_result(error_response)
                             return
                         
-                        print(f"✅ Content fetched successfully ({len(page_content)} chars)")
+                        logger.debug("✅ Content fetched successfully (%s chars)", len(page_content))
                         
-                        # Call OpenAI API
-                        print(f"🤖 Calling OpenAI API for action: {action}")
-                        if action == 'analyze':
-                            openai_result = self.call_openai_analyze(page_content, api_key)
+                        # Call OpenAI API, unless this exact page was just processed with this same key.
+                        # The key is part of the hashed cache key, so one caller's paid result is never
+                        # served to another (and the key itself isn't kept in memory by the cache).
+                        cache_key = hashlib.sha256(f'{action}|{api_key}|{page_content}'.encode('utf-8')).hexdigest()
+                        openai_result = get_cached_result(cache_key)
+                        if openai_result is not None:
+                            logger.debug("♻️ Using cached result for action: %s", action)
                         else:
-                            openai_result = self.call_openai_summarize(page_content, api_key)
+                            logger.debug("🤖 Calling OpenAI API for action: %s", action)
+                            if action == 'analyze' and self.streaming:
+                                openai_result = self.stream_openai_analyze(page_content, api_key)
+                            elif action == 'analyze':
+                                openai_result = self.call_openai_analyze(page_content, api_key)
+                            else:
+                                openai_result = self.call_openai_summarize(page_content, api_key)
+                            if openai_result.get('success'):
+                                cache_result(cache_key, openai_result)
                         
                         if openai_result.get('success'):
-                            print(f"✅ OpenAI API call successful")
-                            if action == 'summarize':
-                                is_article = openai_result.get('is_article', True)
-                                print(f"📄 Article detected: {is_article}")
+                            logger.debug("✅ OpenAI API call successful (is_article=%s)", openai_result.get('is_article'))
                         else:
-                            print(f"❌ OpenAI API call failed: {openai_result.get('error', 'Unknown error')}")
+                            logger.warning("❌ OpenAI API call failed: %s", openai_result.get('error', 'Unknown error'))
                         
-                        self.wfile.write(json.dumps(openai_result).encode('utf-8'))
-                        print(f"📤 Response sent successfully")
-                        print(f"{'='*50}\n")
+                        self._write_result(openai_result)
                         
                     except Exception as e:
-                        print(f"💥 EXCEPTION in summarize endpoint: {str(e)}")
-                        print(f"{'='*50}\n")
+                        logger.exception("💥 Exception in summarize endpoint: %s", e)
                         error_response = {'success': False, 'error': str(e)}
-                        self.wfile.write(json.dumps(error_response).encode('utf-8'))
+                        self._write_result(error_response)
                         
             except json.JSONDecodeError:
                 self.send_error(400, 'Invalid JSON')
@@ -132,139 +403,124 @@ class CORSHandler(BaseHTTPRequestHandler):
             self.send_error(404, 'Not found')
 
     def log_message(self, format, *args):
-        print(f"[{self.date_time_string()}] {format % args}")
+        # Access log lines only at debug level - one per request adds up under load
+        logger.debug("%s " + format, self.address_string(), *args)
     
     def fetch_page_content(self, url):
         """Fetch and clean page content from URL"""
         try:
-            print(f"Fetching content from: {url}")
-            
-            # Create request with user agent
-            req = urllib.request.Request(url, headers={
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            })
-            
-            # Handle SSL context
-            context = ssl.create_default_context()
-            context.check_hostname = False
-            context.verify_mode = ssl.CERT_NONE
+            # Revalidate a previously fetched page instead of downloading it again
+            headers = {}
+            cached_page = get_cached_page(url)
+            if cached_page:
+                etag, last_modified, cached_text = cached_page
+                if etag:
+                    headers['If-None-Match'] = etag
+                if last_modified:
+                    headers['If-Modified-Since'] = last_modified
             
-            with urllib.request.urlopen(req, context=context, timeout=10) as response:
-                html = response.read().decode('utf-8', errors='ignore')
-            
-            # Basic HTML cleaning - remove scripts, styles, and HTML tags
-            # Remove script and style elements
-            html = re.sub(r'<script\b[^<]*(?:(?!<\/script>)<[^<]*)*<\/script>', '', html, flags=re.IGNORECASE)
-            html = re.sub(r'<style\b[^<]*(?:(?!<\/style>)<[^<]*)*<\/style>', '', html, flags=re.IGNORECASE)
-            
-            # Remove HTML tags
-            text = re.sub(r'<[^>]+>', ' ', html)
+            # The session sends the browser user agent and reuses connections to the same site.
+            # Stream the body and stop reading once enough HTML has arrived, so huge pages
+            # never sit in memory whole.
+            with http_session.get(url, headers=headers, timeout=10, stream=True) as response:
+                if response.status_code == 304 and cached_page:
+                    logger.debug("♻️ Page not modified, reusing %s cached characters", len(cached_text))
+                    return cached_text
+                response.raise_for_status()
+                
+                chunks = []
+                size = 0
+                for chunk in response.iter_content(PAGE_READ_CHUNK):
+                    chunks.append(chunk)
+                    size += len(chunk)
+                    if size >= PAGE_HTML_MAX_BYTES:
+                        break
+            html = b''.join(chunks)[:PAGE_HTML_MAX_BYTES].decode('utf-8', errors='ignore')
             
-            # Clean up whitespace
-            text = re.sub(r'\s+', ' ', text).strip()
+            # Strip scripts, styles and tags with a single parser pass - the old
+            # regexes backtracked badly on large or malformed pages
+            text = extract_text(html)
             
-            # Limit content length
-            if len(text) > 5000:
-                text = text[:5000]
+            # Only pages with a validator can be revalidated later
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            if etag or last_modified:
+                cache_page(url, etag, last_modified, text)
             
-            print(f"Extracted {len(text)} characters of text")
+            logger.debug("Extracted %s characters of text from %s", len(text), url)
             return text
             
         except Exception as e:
-            print(f"Error fetching content: {e}")
+            logger.info("Error fetching content from %s: %s", url, e)
             return None
     
     def call_openai_summarize(self, content, api_key):
-        """Call OpenAI API for summarization"""
+        """Classify and summarize the page in a single OpenAI call"""
         try:
-            import json
-            
-            # First check if this is an article
-            article_check_response = self.check_if_article(content, api_key)
-            if not article_check_response['is_article']:
-                return {
-                    'success': True,
-                    'summary': article_check_response['message'],
-                    'is_article': False
-                }
-            
-            headers = {
-                'Content-Type': 'application/json',
-                'Authorization': f'Bearer {api_key}'
-            }
-            
             data = {
-                'model': 'gpt-3.5-turbo',
+                **SUMMARIZE_REQUEST,
                 'messages': [
-                    {
-                        'role': 'system',
-                        'content': 'You are a helpful assistant that creates concise summaries of web pages. Provide a brief 2-3 sentence summary that captures the main purpose and key information of the page.'
-                    },
+                    SUMMARIZE_SYSTEM_MESSAGE,
                     {
                         'role': 'user', 
-                        'content': f'Please summarize this web page content in 2-3 sentences:\n\n{content}'
+                        'content': f'Analyze this page content and, if it\'s a single article, summarize it:\n\n{content}'
                     }
-                ],
-                'temperature': 0.3,
-                'max_tokens': 150
+                ]
             }
             
-            req = urllib.request.Request(
-                'https://api.openai.com/v1/chat/completions',
-                data=json.dumps(data).encode('utf-8'),
-                headers=headers
-            )
+            result = post_openai_chat(data, api_key)
             
-            with urllib.request.urlopen(req, timeout=30) as response:
-                result = json.loads(response.read().decode('utf-8'))
+            gpt_response = result['choices'][0]['message']['content']
+            logger.debug("Summarize response: %s", gpt_response)
+            
+            try:
+                analysis = loads_json(gpt_response)
+            except json.JSONDecodeError:
+                # Fallback if GPT doesn't return valid JSON - treat the reply as the summary
+                logger.info("Failed to parse GPT response as JSON, using raw response as summary")
+                return {
+                    'success': True,
+                    'summary': gpt_response,
+                    'is_article': True
+                }
+            
+            if not analysis.get('is_article', True):
+                return {
+                    'success': True,
+                    'summary': self.non_article_message(analysis.get('page_type', 'unknown')),
+                    'is_article': False
+                }
             
             return {
                 'success': True,
-                'summary': result['choices'][0]['message']['content'],
+                'summary': analysis.get('summary') or gpt_response,
                 'is_article': True
             }
             
         except Exception as e:
-            print(f"OpenAI API error: {e}")
+            logger.warning("OpenAI API error: %s", e)
             return {
                 'success': False,
                 'error': f'OpenAI API error: {str(e)}'
             }
     
+    def analyze_request(self, content):
+        """Build the OpenAI request for sentence analysis"""
+        return {
+            **ANALYZE_REQUEST,
+            'messages': [
+                ANALYZE_SYSTEM_MESSAGE,
+                {
+                    'role': 'user',
+                    'content': f'Here is the page content. Please identify the top 5 sentences that best convey the purpose of this page:\n\n{content}'
+                }
+            ]
+        }
+    
     def call_openai_analyze(self, content, api_key):
         """Call OpenAI API for sentence analysis"""
         try:
-            import json
-            
-            headers = {
-                'Content-Type': 'application/json',
-                'Authorization': f'Bearer {api_key}'
-            }
-            
-            data = {
-                'model': 'gpt-3.5-turbo',
-                'messages': [
-                    {
-                        'role': 'system',
-                        'content': 'You are a helpful assistant that analyzes web page content. When given page text, identify and list the top 5 sentences that best convey the purpose and main message of the page. Format your response as a numbered list with just the sentences, no additional commentary.'
-                    },
-                    {
-                        'role': 'user',
-                        'content': f'Here is the page content. Please identify the top 5 sentences that best convey the purpose of this page:\n\n{content}'
-                    }
-                ],
-                'temperature': 0.3,
-                'max_tokens': 300
-            }
-            
-            req = urllib.request.Request(
-                'https://api.openai.com/v1/chat/completions',
-                data=json.dumps(data).encode('utf-8'),
-                headers=headers
-            )
-            
-            with urllib.request.urlopen(req, timeout=30) as response:
-                result = json.loads(response.read().decode('utf-8'))
+            result = post_openai_chat(self.analyze_request(content), api_key)
             
             return {
                 'success': True,
@@ -272,131 +528,122 @@ class CORSHandler(BaseHTTPRequestHandler):
             }
             
         except Exception as e:
-            print(f"OpenAI API error: {e}")
+            logger.warning("OpenAI API error: %s", e)
             return {
                 'success': False,
                 'error': f'OpenAI API error: {str(e)}'
             }
     
-    def check_if_article(self, content, api_key):
-        """Check if the page content is a single article vs index/landing page"""
+    def stream_openai_analyze(self, content, api_key):
+        """Send sentence analysis tokens to the client as they arrive and return the full result"""
         try:
-            import json
+            parts = []
+            for delta in stream_openai_chat(self.analyze_request(content), api_key):
+                parts.append(delta)
+                self._write_event({'content': delta})
             
-            headers = {
-                'Content-Type': 'application/json',
-                'Authorization': f'Bearer {api_key}'
-            }
+            # Only a non-empty analysis counts as success, so an empty one is never cached
+            if not parts:
+                return {
+                    'success': False,
+                    'error': 'OpenAI returned an empty analysis'
+                }
             
-            data = {
-                'model': 'gpt-3.5-turbo',
-                'messages': [
-                    {
-                        'role': 'system',
-                        'content': '''You are an expert at identifying web page types. Analyze the given content and determine if it's a single article/blog post or a homepage/index/listing page.
-                        
-Article indicators:
-- Has a clear title and author
-- Contains a coherent narrative or argument
-- Focuses on a single topic
-- Has substantial body text
-- Includes publication date
-
-Non-article indicators:
-- Lists of links to other pages
-- Multiple unrelated topics
-- Navigation menus dominate
-- Homepage or landing page
-- Category/tag listing page
-- Search results page
-
-Respond with JSON: {"is_article": true/false, "confidence": 0-100, "page_type": "article|homepage|listing|navigation|other", "reason": "brief explanation"}'''
-                    },
-                    {
-                        'role': 'user',
-                        'content': f'Analyze this page content and determine if it\'s a single article:\n\n{content[:2000]}'
-                    }
-                ],
-                'temperature': 0.1,
-                'max_tokens': 150
+            return {
+                'success': True,
+                'analysis': ''.join(parts)
             }
             
-            req = urllib.request.Request(
-                'https://api.openai.com/v1/chat/completions',
-                data=json.dumps(data).encode('utf-8'),
-                headers=headers
-            )
-            
-            with urllib.request.urlopen(req, timeout=30) as response:
-                result = json.loads(response.read().decode('utf-8'))
-            
-            # Parse the GPT response
-            gpt_response = result['choices'][0]['message']['content']
-            print(f"Article check response: {gpt_response}")
-            
-            try:
-                analysis = json.loads(gpt_response)
-                is_article = analysis.get('is_article', False)
-                page_type = analysis.get('page_type', 'unknown')
-                confidence = analysis.get('confidence', 0)
-                reason = analysis.get('reason', '')
-                
-                if not is_article:
-                    if page_type == 'homepage':
-                        message = "This appears to be a homepage or main site page. This tool is designed for summarizing individual articles."
-                    elif page_type == 'listing':
-                        message = "This appears to be a listing or category page with multiple articles. Please navigate to a specific article to summarize."
-                    elif page_type == 'navigation':
-                        message = "This appears to be a navigation or menu page. Please select a specific article to summarize."
-                    else:
-                        message = f"This doesn't appear to be a single article. It looks like a {page_type} page. This tool works best with individual articles or blog posts."
-                    
-                    return {
-                        'is_article': False,
-                        'message': message,
-                        'confidence': confidence,
-                        'page_type': page_type
-                    }
-                else:
-                    return {
-                        'is_article': True,
-                        'confidence': confidence,
-                        'page_type': page_type
-                    }
-                    
-            except json.JSONDecodeError:
-                # Fallback if GPT doesn't return valid JSON
-                print("Failed to parse GPT response as JSON, using fallback")
-                return {
-                    'is_article': True,  # Default to true to avoid blocking
-                    'confidence': 50,
-                    'page_type': 'unknown'
-                }
-                
         except Exception as e:
-            print(f"Error checking article type: {e}")
-            # On error, default to allowing summarization
+            logger.warning("OpenAI API error: %s", e)
             return {
-                'is_article': True,
-                'confidence': 0,
-                'page_type': 'unknown'
+                'success': False,
+                'error': f'OpenAI API error: {str(e)}'
             }
+    
+    def non_article_message(self, page_type):
+        """Explain to the user why a non-article page can't be summarized"""
+        if page_type == 'homepage':
+            return "This appears to be a homepage or main site page. This tool is designed for summarizing individual articles."
+        elif page_type == 'listing':
+            return "This appears to be a listing or category page with multiple articles. Please navigate to a specific article to summarize."
+        elif page_type == 'navigation':
+            return "This appears to be a navigation or menu page. Please select a specific article to summarize."
+        else:
+            return f"This doesn't appear to be a single article. It looks like a {page_type} page. This tool works best with individual articles or blog posts."
+
+def spawn_worker(server):
+    """Fork a child that serves requests on the already-bound socket, returning its pid"""
+    pid = os.fork()
+    if pid == 0:
+        # The child stops on SIGTERM and Ctrl+C like a standalone server, not via the supervisor's handlers
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os._exit(0)
+    return pid
+
+def supervise_workers(server, workers):
+    """Keep workers children running until SIGTERM/SIGINT, then forward the signal and reap them"""
+    children = set()
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for _ in range(workers):
+        children.add(spawn_worker(server))
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+        if not stopping:
+            logger.warning("⚠️ Worker %s exited (status %s) - starting a replacement", pid, status)
+            children.add(spawn_worker(server))
+
+    print("\nShutting down server...")
+    server.server_close()
 
 if __name__ == '__main__':
-    import os
+    logging.basicConfig(level=logging.INFO)
     
     # Get port from environment variable for cloud deployment
     port = int(os.environ.get('PORT', 8000))
     host = '0.0.0.0'  # Bind to all interfaces for cloud deployment
     
-    server = HTTPServer((host, port), CORSHandler)
+    # Worker processes sharing the listening socket - set WEB_CONCURRENCY to use more cores
+    workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+    
+    # One thread per request, so a slow OpenAI call doesn't block every other client
+    server = ThreadingHTTPServer((host, port), CORSHandler)
     print(f"Starting server on {host}:{port}")
     print(f"Test endpoint: http://{host}:{port}/api/test")
     print(f"Summarize endpoint: http://{host}:{port}/api/summarize")
+    print(f"Worker processes: {workers}")
     print("Press Ctrl+C to stop")
     
-    try:
-        server.serve_forever()
-    except KeyboardInterrupt:
-        print("\nShutting down server...")
-        server.shutdown()
\ No newline at end of file
+    # Fork after binding so every worker accepts connections on the same socket; the parent only supervises
+    if workers > 1:
+        supervise_workers(server, workers)
+    else:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\nShutting down server...")
+            server.shutdown()
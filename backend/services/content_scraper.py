@@ -6,17 +6,156 @@ with better article detection, content cleaning, and metadata extraction.
 """
 
 import requests
-import time
 import re
-from bs4 import BeautifulSoup
+import socket
+import threading
+import time
+from collections import OrderedDict
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, SoupStrainer
+import soupsieve
 from urllib.parse import urljoin, urlparse
 from typing import Dict, Optional, Tuple
 import logging
 
+from services.host_throttle import wait_for_host
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# lxml's C parser is several times faster than the pure-Python html.parser; use it when installed
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+# Every extraction strategy looks inside <body> and the fallback title comes from <title>, so
+# the rest of <head> (inline scripts, styles, meta tags) never needs to become part of the tree
+PAGE_STRAINER = SoupStrainer(['title', 'body'])
+
+# Most article pages are well under this; anything past it is read no further, so a huge or
+# never-ending response can't be pulled into memory whole
+PAGE_MAX_BYTES = 1_000_000
+PAGE_READ_CHUNK = 16384
+
+# Responses declaring any other Content-Type (PDFs, images, JSON, archives) are never parsed
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+
+# Runs of whitespace collapsed to a single space when cleaning extracted text
+WHITESPACE_RE = re.compile(r'\s+')
+
+# Page chrome dropped before text extraction
+UNWANTED_TAGS = ('script', 'style', 'nav', 'header', 'footer', 'aside')
+BODY_UNWANTED_TAGS = UNWANTED_TAGS + ('advertisement',)
+
+# Candidate selectors, compiled once instead of re-parsed by soupsieve on every scrape.
+# Order matters - the first selector that yields enough text wins.
+ARTICLE_SELECTORS = [soupsieve.compile(selector) for selector in (
+    'article',
+    '[role="main"]',
+    '.article-content',
+    '.post-content',
+    '.entry-content',
+    '.content',
+    '.main-content',
+    '#content',
+    '#main'
+)]
+MAIN_SELECTORS = [soupsieve.compile(selector) for selector in (
+    'main',
+    '.main',
+    '#main',
+    '.content-wrapper',
+    '.page-content',
+    '.post-body',
+    '.entry-body'
+)]
+TITLE_SELECTORS = [soupsieve.compile(selector) for selector in (
+    'h1',
+    'title',
+    '.title',
+    '.headline',
+    '.post-title',
+    '.entry-title'
+)]
+
+# One pooled session shared by every scraper in the process, so repeat fetches from the same site
+# reuse kept-alive TCP/TLS connections instead of handshaking again for each ContentScraper
+scraper_http = requests.Session()
+_scraper_adapter = HTTPAdapter(
+    pool_connections=20,
+    pool_maxsize=20,
+    # raise_on_status=False hands the last 5xx back to raise_for_status so errors read the same as before
+    max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504], raise_on_status=False)
+)
+scraper_http.mount('https://', _scraper_adapter)
+scraper_http.mount('http://', _scraper_adapter)
+
+# Enhanced headers to mimic real browser
+scraper_http.headers.update({
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
+    'Accept-Language': 'en-US,en;q=0.9',
+    # Only advertise encodings urllib3 can decode here (br needs the brotli package)
+    'Accept-Encoding': make_headers(accept_encoding=True)['accept-encoding'],
+    'DNT': '1',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'none',
+    'Sec-Fetch-User': '?1',
+    'Cache-Control': 'max-age=0'
+})
+
+# Extraction results for pages that sent an ETag or Last-Modified validator, keyed by URL.
+# A repeat scrape revalidates with a conditional GET and reuses the result on 304 Not Modified.
+EXTRACTION_CACHE_MAX = 256
+_extraction_cache = OrderedDict()
+_extraction_cache_lock = threading.Lock()
+
+
+def get_cached_extraction(url: str) -> Optional[Tuple[Optional[str], Optional[str], Dict]]:
+    """Return (etag, last_modified, content_result) for a previously scraped page, or None"""
+    with _extraction_cache_lock:
+        entry = _extraction_cache.get(url)
+        if entry:
+            _extraction_cache.move_to_end(url)
+        return entry
+
+
+def cache_extraction(url: str, etag: Optional[str], last_modified: Optional[str], content_result: Dict) -> None:
+    """Remember a page's extraction result with its validators, evicting the least recently used"""
+    with _extraction_cache_lock:
+        _extraction_cache[url] = (etag, last_modified, content_result)
+        _extraction_cache.move_to_end(url)
+        while len(_extraction_cache) > EXTRACTION_CACHE_MAX:
+            _extraction_cache.popitem(last=False)
+
+
+def _response_socket(response: requests.Response) -> Optional[socket.socket]:
+    """The socket a streamed response body is read from, or None if it can't be reached"""
+    sock = getattr(getattr(response.raw, 'connection', None), 'sock', None)
+    if sock is None:
+        # http.client hands the socket to the response when the server will close the connection
+        # (no Content-Length or keep-alive); it then lives only behind the response's file object
+        fp = getattr(getattr(response.raw, '_fp', None), 'fp', None)
+        sock = getattr(getattr(fp, 'raw', None), '_sock', None)
+    return sock
+
+
+def _expire_socket(sock, expired):
+    """Watchdog callback: flag the deadline as passed and unblock any read on sock"""
+    expired.set()
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
 
 class ContentScraper:
     """Enhanced content scraper using requests + BeautifulSoup"""
@@ -24,23 +163,7 @@ class ContentScraper:
     def __init__(self, timeout: int = 15, max_content_length: int = 10000):
         self.timeout = timeout
         self.max_content_length = max_content_length
-        self.session = requests.Session()
-        
-        # Enhanced headers to mimic real browser
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'DNT': '1',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'none',
-            'Sec-Fetch-User': '?1',
-            'Cache-Control': 'max-age=0'
-        })
+        self.session = scraper_http
     
     def scrape_content(self, url: str) -> Dict:
         """
@@ -52,18 +175,64 @@ class ContentScraper:
         try:
             logger.info(f"🌐 Scraping content from: {url}")
             
-            # Add respectful delay
-            time.sleep(0.5)
+            # Stay respectful to the host without delaying fetches to other hosts
+            wait_for_host(url)
             
-            # Fetch the page
-            response = self.session.get(url, timeout=self.timeout)
-            response.raise_for_status()
+            # requests' timeout applies to each socket read, so a site dripping bytes could hold
+            # the caller indefinitely - the body read below also stops at this overall deadline
+            deadline = time.monotonic() + self.timeout
             
-            # Parse with BeautifulSoup
-            soup = BeautifulSoup(response.content, 'html.parser')
+            # Revalidate a previously scraped page instead of downloading and parsing it again
+            headers = {}
+            cached = get_cached_extraction(url)
+            if cached:
+                etag, last_modified, _ = cached
+                if etag:
+                    headers['If-None-Match'] = etag
+                if last_modified:
+                    headers['If-Modified-Since'] = last_modified
             
-            # Extract content using multiple strategies
-            content_result = self._extract_content(soup, url)
+            # Fetch the page, streaming the body so reading can stop at PAGE_MAX_BYTES
+            with self.session.get(url, headers=headers, timeout=self.timeout, stream=True) as response:
+                if response.status_code == 304 and cached:
+                    page = None
+                else:
+                    response.raise_for_status()
+                    
+                    # Bail out before downloading a body BeautifulSoup can't make sense of;
+                    # a missing header is given the benefit of the doubt
+                    content_type = response.headers.get('Content-Type', '').lower()
+                    if content_type and not content_type.startswith(HTML_CONTENT_TYPES):
+                        error_msg = f"Unsupported content type: {content_type.split(';')[0]}"
+                        logger.error(f"❌ {error_msg}")
+                        return {
+                            'success': False,
+                            'content': None,
+                            'title': None,
+                            'metadata': {'unsupported_content_type': True},
+                            'error': error_msg
+                        }
+                    
+                    page = self._read_capped(response, deadline)
+            
+            if page is None:
+                logger.info(f"♻️ Page not modified, reusing cached extraction for: {url}")
+                content_result = cached[2]
+            else:
+                # Parse with BeautifulSoup, keeping only the parts extraction reads
+                soup = BeautifulSoup(page, HTML_PARSER, parse_only=PAGE_STRAINER)
+                if soup.body is None:
+                    # Fragment without a <body> (html.parser doesn't add one) - fall back to the full tree
+                    soup = BeautifulSoup(page, HTML_PARSER)
+                
+                # Extract content using multiple strategies
+                content_result = self._extract_content(soup, url)
+                
+                # Only pages with a validator can be revalidated later
+                etag = response.headers.get('ETag')
+                last_modified = response.headers.get('Last-Modified')
+                if etag or last_modified:
+                    cache_extraction(url, etag, last_modified, content_result)
             
             if not content_result['content']:
                 return {
@@ -81,7 +250,7 @@ class ContentScraper:
                 'success': True,
                 'content': cleaned_content,
                 'title': content_result['title'],
-                'metadata': content_result['metadata'],
+                'metadata': dict(content_result['metadata']),
                 'error': None
             }
             
@@ -108,7 +277,7 @@ class ContentScraper:
                 'success': False,
                 'content': None,
                 'title': None,
-                'metadata': {},
+                'metadata': {'timed_out': True},
                 'error': error_msg
             }
             
@@ -123,6 +292,41 @@ class ContentScraper:
                 'error': error_msg
             }
     
+    def _read_capped(self, response: requests.Response, deadline: float) -> bytes:
+        """Read a streamed response body, stopping once PAGE_MAX_BYTES have arrived; raises Timeout past deadline"""
+        # Socket timeouts restart on every recv and a chunk read waits for the whole chunk, so a
+        # server trickling bytes never trips them. Shut the socket down at the deadline instead,
+        # which makes the blocked read return immediately.
+        expired = threading.Event()
+        sock = _response_socket(response)
+        watchdog = None
+        if sock is not None:
+            watchdog = threading.Timer(max(deadline - time.monotonic(), 0), _expire_socket, (sock, expired))
+            watchdog.daemon = True
+            watchdog.start()
+        
+        chunks = []
+        size = 0
+        try:
+            for chunk in response.iter_content(PAGE_READ_CHUNK):
+                if expired.is_set() or time.monotonic() > deadline:
+                    break
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= PAGE_MAX_BYTES:
+                    logger.info(f"✂️ Page larger than {PAGE_MAX_BYTES} bytes, parsing the first part only")
+                    break
+        except requests.exceptions.RequestException:
+            if not expired.is_set():
+                raise
+        finally:
+            if watchdog is not None:
+                watchdog.cancel()
+        
+        if expired.is_set() or time.monotonic() > deadline:
+            raise requests.exceptions.Timeout(f"Body still downloading after {self.timeout} seconds")
+        return b''.join(chunks)[:PAGE_MAX_BYTES]
+    
     def _extract_content(self, soup: BeautifulSoup, url: str) -> Dict:
         """Extract content using multiple strategies"""
         
@@ -143,29 +347,17 @@ class ContentScraper:
         """Extract content from article-specific tags"""
         
         # Look for common article containers
-        article_selectors = [
-            'article',
-            '[role="main"]',
-            '.article-content',
-            '.post-content',
-            '.entry-content',
-            '.content',
-            '.main-content',
-            '#content',
-            '#main'
-        ]
-        
-        for selector in article_selectors:
-            elements = soup.select(selector)
+        for selector in ARTICLE_SELECTORS:
+            elements = selector.select(soup)
             if elements:
                 # Get the largest element (likely main content)
-                largest_element = max(elements, key=lambda x: len(x.get_text()))
+                largest_element, largest_text = self._largest_element(elements)
                 
                 # Extract title
                 title = self._extract_title(soup, largest_element)
                 
                 # Clean and extract text
-                content = self._clean_element_text(largest_element)
+                content = self._clean_element_text(largest_element, largest_text)
                 
                 if content and len(content.strip()) > 100:  # Minimum content length
                     return {
@@ -173,7 +365,7 @@ class ContentScraper:
                         'title': title,
                         'metadata': {
                             'extraction_method': 'article_tags',
-                            'selector_used': selector
+                            'selector_used': selector.pattern
                         }
                     }
         
@@ -183,21 +375,11 @@ class ContentScraper:
         """Extract content from main content areas"""
         
         # Look for main content containers
-        main_selectors = [
-            'main',
-            '.main',
-            '#main',
-            '.content-wrapper',
-            '.page-content',
-            '.post-body',
-            '.entry-body'
-        ]
-        
-        for selector in main_selectors:
-            elements = soup.select(selector)
+        for selector in MAIN_SELECTORS:
+            elements = selector.select(soup)
             if elements:
-                largest_element = max(elements, key=lambda x: len(x.get_text()))
-                content = self._clean_element_text(largest_element)
+                largest_element, largest_text = self._largest_element(elements)
+                content = self._clean_element_text(largest_element, largest_text)
                 
                 if content and len(content.strip()) > 100:
                     return {
@@ -205,7 +387,7 @@ class ContentScraper:
                         'title': self._extract_title(soup, largest_element),
                         'metadata': {
                             'extraction_method': 'main_content',
-                            'selector_used': selector
+                            'selector_used': selector.pattern
                         }
                     }
         
@@ -214,14 +396,13 @@ class ContentScraper:
     def _extract_body_content(self, soup: BeautifulSoup, url: str) -> Dict:
         """Fallback: extract from body tag"""
         
-        # Remove unwanted elements
-        for element in soup(['script', 'style', 'nav', 'header', 'footer', 'aside', 'advertisement']):
-            element.decompose()
+        # Remove unwanted elements from the whole page in one pass
+        self._remove_unwanted(soup, BODY_UNWANTED_TAGS)
         
-        # Get body content
+        # Get body content - already stripped above, so no second pass over it
         body = soup.find('body')
         if body:
-            content = self._clean_element_text(body)
+            content = self._clean_text(self._element_text(body))
         else:
             content = soup.get_text()
         
@@ -238,18 +419,9 @@ class ContentScraper:
         """Extract page title"""
         
         # Try different title sources
-        title_selectors = [
-            'h1',
-            'title',
-            '.title',
-            '.headline',
-            '.post-title',
-            '.entry-title'
-        ]
-        
         if context_element:
-            for selector in title_selectors:
-                title_elem = context_element.select_one(selector)
+            for selector in TITLE_SELECTORS:
+                title_elem = selector.select_one(context_element)
                 if title_elem and title_elem.get_text().strip():
                     return title_elem.get_text().strip()
         
@@ -260,27 +432,56 @@ class ContentScraper:
         
         return "Untitled"
     
-    def _clean_element_text(self, element) -> str:
-        """Clean text from a BeautifulSoup element"""
+    def _largest_element(self, elements) -> Tuple:
+        """Return the element with the most text, along with that text so it isn't extracted twice"""
+        return max(((element, element.get_text()) for element in elements), key=lambda pair: len(pair[1]))
+    
+    def _clean_element_text(self, element, text: Optional[str] = None) -> str:
+        """Clean text from a BeautifulSoup element, reusing its already extracted text when given"""
         
         # Remove unwanted elements
-        for unwanted in element.find_all(['script', 'style', 'nav', 'header', 'footer', 'aside']):
-            unwanted.decompose()
+        removed = self._remove_unwanted(element, UNWANTED_TAGS)
         
-        # Get text content
-        text = element.get_text()
+        # Get text content - only walk the subtree again if removing elements changed it
+        if text is None or removed:
+            text = self._element_text(element)
         
-        # Clean up whitespace
-        text = re.sub(r'\s+', ' ', text)
-        text = text.strip()
+        return self._clean_text(text)
+    
+    def _element_text(self, element) -> str:
+        """
+        Concatenate an element's text like get_text(), but stop once there is enough of it
         
-        return text
+        _clean_content keeps at most max_content_length characters of whitespace-collapsed text,
+        so once the collapsed text read so far reaches that length the rest of the subtree can't
+        change the result.
+        """
+        limit = max(self.max_content_length, 1000)
+        parts = []
+        size = 0
+        for string in element.strings:
+            parts.append(string)
+            size += len(WHITESPACE_RE.sub(' ', string).strip())
+            if size >= limit:
+                break
+        return ''.join(parts)
+    
+    def _remove_unwanted(self, element, tags: Tuple[str, ...]) -> bool:
+        """Decompose every tag in tags under element, returning whether any were found"""
+        unwanted_elements = element.find_all(tags)
+        for unwanted in unwanted_elements:
+            unwanted.decompose()
+        return bool(unwanted_elements)
+    
+    def _clean_text(self, text: str) -> str:
+        """Collapse whitespace in extracted text"""
+        return WHITESPACE_RE.sub(' ', text).strip()
     
     def _clean_content(self, content: str) -> str:
         """Final content cleaning and length limiting"""
         
         # Remove extra whitespace
-        content = re.sub(r'\s+', ' ', content)
+        content = WHITESPACE_RE.sub(' ', content)
         content = content.strip()
         
         # Limit content length
@@ -0,0 +1,44 @@
+"""
+Per-host Fetch Throttle
+
+Keeps page fetches to the same host at least a short interval apart, without
+delaying fetches to hosts that haven't been contacted recently.
+"""
+
+import threading
+import time
+from urllib.parse import urlparse
+
+# Minimum gap between two fetches to the same host, in seconds
+MIN_HOST_INTERVAL = 0.5
+
+# Host -> reserved slot, in the order hosts last reserved one
+_last_fetch: dict = {}
+_lock = threading.Lock()
+
+
+def wait_for_host(url: str, interval: float = MIN_HOST_INTERVAL) -> None:
+    """
+    Sleep only as long as needed to keep fetches to url's host interval seconds apart
+
+    Args:
+        url: URL about to be fetched
+        interval: Minimum seconds between fetches to the same host
+    """
+    host = urlparse(url).netloc
+    with _lock:
+        now = time.monotonic()
+        # Forget hosts whose slot is over an interval old - they no longer delay anyone, and
+        # keeping them would grow the table by one entry per host ever fetched
+        while _last_fetch:
+            oldest = next(iter(_last_fetch))
+            if _last_fetch[oldest] + interval > now:
+                break
+            del _last_fetch[oldest]
+        # Reserve this host's next slot before sleeping so concurrent callers queue up behind it.
+        # Re-inserting moves the host to the end, keeping the least recently used hosts first.
+        start = max(now, _last_fetch.pop(host, 0) + interval)
+        _last_fetch[host] = start
+
+    if start > now:
+        time.sleep(start - now)
@@ -3,9 +3,9 @@
 Startup script for Railway deployment
 Handles PORT environment variable properly
 """
+import importlib.util
 import os
 import sys
-from app import app
 
 if __name__ == '__main__':
     # Get port from environment variable
@@ -15,10 +15,22 @@ if __name__ == '__main__':
     print(f"📍 Environment: {os.environ.get('FLASK_ENV', 'production')}")
     print(f"🔗 Database: {'PostgreSQL' if 'postgres' in os.environ.get('DATABASE_URL', '') else 'SQLite'}")
     
-    # Run the Flask app directly (for Railway)
-    # In production, Railway will handle the process management
-    app.run(
-        host='0.0.0.0',
-        port=port,
-        debug=False
-    )
\ No newline at end of file
+    # Hand the process over to gunicorn with the same config the Dockerfile uses - threaded
+    # workers serve requests concurrently, unlike Flask's single-process development server.
+    # gunicorn_config.py reads PORT itself.
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    if importlib.util.find_spec('gunicorn') is None:
+        # Installs without gunicorn (e.g. on Windows) still start, on Flask's own server
+        print("⚠️ gunicorn not installed - falling back to Flask's built-in server")
+        sys.path.insert(0, backend_dir)
+        from app import app
+        app.run(host='0.0.0.0', port=port, debug=False)
+        sys.exit(0)
+    
+    sys.stdout.flush()
+    os.execv(sys.executable, [
+        sys.executable, '-m', 'gunicorn',
+        '--chdir', backend_dir,
+        '--config', os.path.join(backend_dir, 'gunicorn_config.py'),
+        'app:app'
+    ])
@@ -1,21 +1,21 @@
 #!/usr/bin/env python3
 """
-Test if psycopg2 is installed correctly
+Test if psycopg (version 3, the driver the app uses) is installed correctly
 """
 
-print("🧪 Testing psycopg2 installation...")
+print("🧪 Testing psycopg installation...")
 
 try:
-    import psycopg2
-    print("✅ psycopg2 imported successfully!")
-    print(f"   Version: {psycopg2.__version__}")
+    import psycopg
+    print("✅ psycopg imported successfully!")
+    print(f"   Version: {psycopg.__version__}")
     
     # Test connection
     try:
-        conn = psycopg2.connect(
+        conn = psycopg.connect(
             host="postgres",
             port=5432,
-            database="chrome_extension", 
+            dbname="chrome_extension", 
             user="chrome_user",
             password="chrome_password"
         )
@@ -25,7 +25,7 @@ try:
         print(f"❌ PostgreSQL connection failed: {e}")
         
 except ImportError as e:
-    print(f"❌ Failed to import psycopg2: {e}")
+    print(f"❌ Failed to import psycopg: {e}")
     
     # Check what's installed
     import pkg_resources
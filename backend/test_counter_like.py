@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Test script for the counter and cnter endpoints
+
+Both endpoint families behave the same, so one suite is run against each:
+    python test_counter_like.py [counter|cnter]
+    python test_counter_like.py simple [counter|cnter]
+    python test_counter_like.py compare
+    python test_counter_like.py load [requests] [concurrency] [counter|cnter]
+"""
+
+import requests
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+BASE_URL = "http://localhost:8000"
+KINDS = ("counter", "cnter")
+
+# Endpoint URLs, built once rather than formatted on every request
+INCREMENT_URLS = {kind: f"{BASE_URL}/api/{kind}/increment" for kind in KINDS}
+ITEM_URLS = {kind: f"{BASE_URL}/api/{kind}/{{}}" for kind in KINDS}
+LIST_URLS = {kind: f"{BASE_URL}/api/{kind}s" for kind in KINDS}
+
+# One session for every call so requests reuse a kept-alive connection instead of reconnecting
+http_session = requests.Session()
+# Enough pooled sockets for the concurrent bursts, and a few quick retries for transient 502/503/504s
+# such as a redeploy in progress. urllib3 never retries a POST that reached the server, so increments
+# aren't double-counted; raise_on_status=False hands the last response back so failures still print.
+HTTP_RETRY = Retry(total=3, backoff_factor=0.1, status_forcelist=[502, 503, 504], raise_on_status=False)
+_http_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=HTTP_RETRY)
+http_session.mount('https://', _http_adapter)
+http_session.mount('http://', _http_adapter)
+
+# Request bodies never change, so serialize them once instead of on every call
+JSON_HEADERS = {'Content-Type': 'application/json'}
+EMPTY_BODY = b"{}"
+BODIES = {name: json.dumps({"name": name}).encode() for name in ("test", "rapid", "compare", "load")}
+
+def run_suite(kind):
+    """Test all endpoints of one kind ('counter' or 'cnter')"""
+    label = kind.capitalize()
+    increment_url = INCREMENT_URLS[kind]
+
+    print(f"🧪 Testing {label} Endpoints")
+    print("=" * 40)
+
+    # Test 1: Increment default counter
+    print(f"\n1️⃣ Testing {kind} increment (default):")
+    try:
+        response = http_session.post(increment_url, data=EMPTY_BODY, headers=JSON_HEADERS)
+
+        if response.status_code == 200:
+            data = response.json()
+            print(f"✅ Success: {data['message']}")
+            print(f"   Count: {data[kind]['count']}")
+        else:
+            print(f"❌ Failed: {response.status_code} - {response.text}")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+
+    # Test 2: Increment named counter
+    print(f"\n2️⃣ Testing {kind} increment (named 'test'):")
+    try:
+        response = http_session.post(increment_url, data=BODIES["test"], headers=JSON_HEADERS)
+
+        if response.status_code == 200:
+            data = response.json()
+            print(f"✅ Success: {data['message']}")
+            print(f"   Count: {data[kind]['count']}")
+        else:
+            print(f"❌ Failed: {response.status_code} - {response.text}")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+
+    # Test 3: Increment multiple times - all at once, so concurrent increments are exercised too
+    print("\n3️⃣ Testing multiple increments:")
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        increments = [
+            executor.submit(http_session.post, increment_url, data=BODIES["rapid"], headers=JSON_HEADERS)
+            for _ in range(3)
+        ]
+
+    counts = []
+    for i, increment in enumerate(increments):
+        try:
+            response = increment.result()
+
+            if response.status_code == 200:
+                count = response.json()[kind]['count']
+                counts.append(count)
+                print(f"   Increment {i+1}: Count = {count}")
+            else:
+                print(f"❌ Failed increment {i+1}: {response.status_code}")
+        except Exception as e:
+            print(f"❌ Error on increment {i+1}: {e}")
+
+    # Every increment should have seen a different count if none were lost
+    print(f"   Counts in order applied: {sorted(counts)}")
+    if len(set(counts)) == len(counts):
+        print("✅ Every concurrent increment saw a distinct count")
+    else:
+        print(f"❌ Lost increments: {len(counts) - len(set(counts))} concurrent increments repeated a count")
+
+    # Tests 4-6 only read, so send all three requests at once and check the responses in order
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        specific_request = executor.submit(http_session.get, ITEM_URLS[kind].format("test"))
+        all_request = executor.submit(http_session.get, LIST_URLS[kind])
+        missing_request = executor.submit(http_session.get, ITEM_URLS[kind].format("nonexistent"))
+
+    # Test 4: Get specific counter
+    print(f"\n4️⃣ Testing get {kind}:")
+    try:
+        response = specific_request.result()
+
+        if response.status_code == 200:
+            data = response.json()
+            print(f"✅ {label} 'test': {data[kind]['count']}")
+        else:
+            print(f"❌ Failed: {response.status_code} - {response.text}")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+
+    # Test 5: Get all counters
+    print(f"\n5️⃣ Testing get all {kind}s:")
+    try:
+        response = all_request.result()
+
+        if response.status_code == 200:
+            data = response.json()
+            print(f"✅ Found {data['total']} {kind}s:")
+            for item in data[f"{kind}s"]:
+                print(f"   - {item['name']}: {item['count']}")
+        else:
+            print(f"❌ Failed: {response.status_code} - {response.text}")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+
+    # Test 6: Test non-existent counter
+    print(f"\n6️⃣ Testing non-existent {kind}:")
+    try:
+        response = missing_request.result()
+
+        if response.status_code == 404:
+            print(f"✅ Correctly returned 404 for non-existent {kind}")
+        else:
+            print(f"❌ Expected 404, got {response.status_code}")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+
+    print(f"\n🎉 {label} endpoint tests completed!")
+
+def simple_increment_test(kind):
+    """Simple test that just increments a counter of one kind"""
+    label = kind.capitalize()
+    print(f"🔥 Simple {label} Increment Test")
+    print("=" * 35)
+
+    try:
+        response = http_session.post(INCREMENT_URLS[kind])
+
+        if response.status_code == 200:
+            item = response.json()[kind]
+            print(f"✅ {label} incremented!")
+            print(f"   Name: {item['name']}")
+            print(f"   Count: {item['count']}")
+            print(f"   Updated: {item['updated_at']}")
+        else:
+            print(f"❌ Failed: {response.status_code}")
+            print(f"   Response: {response.text}")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+
+def compare_counter_and_cnter():
+    """Compare counter and cnter endpoints side by side"""
+    print("🔄 Comparing Counter vs Cnter")
+    print("=" * 35)
+
+    # The two endpoints don't depend on each other, so send both increments at once
+    with ThreadPoolExecutor(max_workers=len(KINDS)) as executor:
+        requests_by_kind = {
+            kind: executor.submit(http_session.post, INCREMENT_URLS[kind], data=BODIES["compare"], headers=JSON_HEADERS)
+            for kind in KINDS
+        }
+
+    for kind, pending in requests_by_kind.items():
+        label = kind.capitalize()
+        try:
+            response = pending.result()
+            if response.status_code == 200:
+                print(f"✅ {label}: {response.json()[kind]['count']}")
+            else:
+                print(f"❌ {label} failed: {response.status_code}")
+        except Exception as e:
+            print(f"❌ {label} error: {e}")
+
+def load_test(total=200, concurrency=10, kind="cnter"):
+    """Send total increments with up to concurrency in flight, then report latency percentiles and throughput"""
+    print(f"🏋️ {kind.capitalize()} Load Test: {total} requests, {concurrency} concurrent")
+    print("=" * 35)
+
+    # Keep one pooled connection per in-flight request so none are opened and discarded mid-run,
+    # with the same retry policy so later modes in this process still retry transient 5xx
+    load_adapter = HTTPAdapter(pool_maxsize=max(concurrency, 16), max_retries=HTTP_RETRY)
+    http_session.mount('http://', load_adapter)
+    http_session.mount('https://', load_adapter)
+    increment_url = INCREMENT_URLS[kind]
+
+    def timed_increment(_):
+        start = time.perf_counter()
+        try:
+            status = http_session.post(increment_url, data=BODIES["load"], headers=JSON_HEADERS).status_code
+        except requests.exceptions.RequestException:
+            status = None
+        return time.perf_counter() - start, status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(timed_increment, range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for latency, _ in results)
+    succeeded = sum(1 for _, status in results if status == 200)
+    print(f"✅ {succeeded}/{total} succeeded in {elapsed:.2f}s ({total / elapsed:.1f} req/s)")
+
+    if len(latencies) >= 2:
+        percentiles = statistics.quantiles(latencies, n=100)
+        print(f"   p50: {percentiles[49] * 1000:.1f} ms")
+        print(f"   p95: {percentiles[94] * 1000:.1f} ms")
+        print(f"   p99: {percentiles[98] * 1000:.1f} ms")
+
+if __name__ == '__main__':
+    import sys
+
+    mode = sys.argv[1] if len(sys.argv) > 1 else None
+
+    if mode == 'simple':
+        for kind in sys.argv[2:3] or KINDS:
+            simple_increment_test(kind)
+    elif mode == 'compare':
+        compare_counter_and_cnter()
+    elif mode == 'load':
+        total = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+        concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+        kind = sys.argv[4] if len(sys.argv) > 4 else "cnter"
+        load_test(total, concurrency, kind)
+    elif mode in KINDS:
+        run_suite(mode)
+    else:
+        for kind in KINDS:
+            run_suite(kind)
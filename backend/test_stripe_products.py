@@ -22,14 +22,15 @@ def test_stripe_products():
             
             # Test basic connection
             print("📦 Fetching products from Stripe...")
-            products = stripe.Product.list(limit=10)
+            # 100 per page is Stripe's maximum; auto-paging walks every page so large accounts are fully listed
+            products = list(stripe.Product.list(limit=100).auto_paging_iter())
             
             print(f"✅ Successfully connected to Stripe!")
-            print(f"📊 Found {len(products.data)} products")
+            print(f"📊 Found {len(products)} products")
             
-            if products.data:
+            if products:
                 print("\n📋 Products found:")
-                for product in products.data:
+                for product in products:
                     print(f"  - {product.name} (ID: {product.id}, Active: {product.active})")
             else:
                 print("ℹ️  No products found in your Stripe account")
@@ -13,7 +13,68 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 # Load environment variables
 load_dotenv()
 
-from app import app, db, User, stripe
+from sqlalchemy import select, update
+
+from app import app, db, User, stripe, TTLCache
+
+# Stripe answers per customer, and a sweep can reach the same customer more than once - ask once an hour
+stripe_subscription_cache = TTLCache(maxsize=1024, ttl=3600)
+
+def fetch_latest_subscriptions(customer_id):
+    """Return the customer's most recent Stripe subscription as a 0- or 1-item list, cached per customer"""
+    subscriptions = stripe_subscription_cache.get(customer_id)
+    if subscriptions is None:
+        subscriptions = stripe.Subscription.list(customer=customer_id, limit=1).data
+        stripe_subscription_cache.set(customer_id, subscriptions)
+    return subscriptions
+
+def subscription_values(sub):
+    """User column values for a Stripe subscription"""
+    # Index items rather than use attribute access - StripeObject is a dict, so sub.items is dict.items
+    items = sub['items']['data']
+    return {
+        'subscription_status': sub.status,
+        'subscription_id': sub.id,
+        'current_period_end': datetime.fromtimestamp(sub.current_period_end),
+        'plan_id': items[0]['price']['id'] if items else None
+    }
+
+def bulk_update(rows):
+    """Write many users' subscription fields as one executemany UPDATE and a single commit"""
+    if not rows:
+        return 0
+    with app.app_context():
+        # Each row is {'id': ..., column: value, ...}; SQLAlchemy matches rows to users by primary key
+        db.session.execute(update(User), rows)
+        db.session.commit()
+    return len(rows)
+
+def sync_all_from_stripe():
+    """Refresh every user that has a Stripe customer from Stripe, saving all changes in one batch"""
+    with app.app_context():
+        users = db.session.execute(
+            select(User.id, User.email, User.stripe_customer_id).where(User.stripe_customer_id.isnot(None))
+        ).all()
+    
+    print(f"Checking Stripe for {len(users)} users...")
+    rows = []
+    for user_id, email, customer_id in users:
+        try:
+            subscriptions = fetch_latest_subscriptions(customer_id)
+        except Exception as e:
+            print(f"  {email}: error checking Stripe: {e}")
+            continue
+        
+        if not subscriptions:
+            print(f"  {email}: no subscriptions in Stripe")
+            continue
+        
+        values = subscription_values(subscriptions[0])
+        print(f"  {email}: {values['subscription_status']} ({values['subscription_id']})")
+        rows.append({'id': user_id, **values})
+    
+    updated = bulk_update(rows)
+    print(f"✅ Updated {updated} users from Stripe")
 
 def update_user_subscription(user_id, check_stripe=False):
     with app.app_context():
@@ -32,22 +93,17 @@ def update_user_subscription(user_id, check_stripe=False):
             print("Checking Stripe for subscription status...")
             try:
                 # Get subscriptions from Stripe
-                subscriptions = stripe.Subscription.list(
-                    customer=user.stripe_customer_id,
-                    limit=1
-                )
+                subscriptions = fetch_latest_subscriptions(user.stripe_customer_id)
                 
-                if subscriptions.data:
-                    sub = subscriptions.data[0]
+                if subscriptions:
+                    sub = subscriptions[0]
                     print(f"Found Stripe subscription: {sub.id}")
                     print(f"  Status: {sub.status}")
                     print(f"  Current period end: {datetime.fromtimestamp(sub.current_period_end)}")
                     
                     # Update user in database
-                    user.subscription_status = sub.status
-                    user.subscription_id = sub.id
-                    user.current_period_end = datetime.fromtimestamp(sub.current_period_end)
-                    user.plan_id = sub.items.data[0].price.id if sub.items.data else None
+                    for column, value in subscription_values(sub).items():
+                        setattr(user, column, value)
                     db.session.commit()
                     print("✅ Updated user subscription from Stripe!")
                 else:
@@ -82,6 +138,10 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Update user subscription status')
     parser.add_argument('--user-id', type=int, default=2, help='User ID to update (default: 2)')
     parser.add_argument('--check-stripe', action='store_true', help='Check Stripe for actual subscription')
+    parser.add_argument('--all', action='store_true', help='Sync every user with a Stripe customer ID from Stripe')
     args = parser.parse_args()
     
-    update_user_subscription(args.user_id, args.check_stripe)
\ No newline at end of file
+    if args.all:
+        sync_all_from_stripe()
+    else:
+        update_user_subscription(args.user_id, args.check_stripe)
\ No newline at end of file
@@ -5,15 +5,29 @@ Test script for Trace API endpoints
 import requests
 import json
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Your Railway deployment URL
 API_BASE_URL = "https://trace-production-79d5.up.railway.app"
 
-def test_health():
-    """Test the health endpoint"""
+# One session for every call so requests reuse a kept-alive connection instead of reconnecting
+http_session = requests.Session()
+# Retry the /health and /api/test GETs a few times on a transient 502/503/504, e.g. while Railway is
+# redeploying; urllib3 doesn't retry the summarize POST. The default pool already covers the three
+# concurrent requests. raise_on_status=False hands the last response back so its status still prints.
+_http_adapter = HTTPAdapter(
+    max_retries=Retry(total=3, backoff_factor=0.1, status_forcelist=[502, 503, 504], raise_on_status=False)
+)
+http_session.mount('https://', _http_adapter)
+http_session.mount('http://', _http_adapter)
+
+def test_health(pending):
+    """Test the health endpoint, given its in-flight request"""
     print("🔍 Testing /health endpoint...")
     try:
-        response = requests.get(f"{API_BASE_URL}/health")
+        response = pending.result()
         print(f"Status Code: {response.status_code}")
         if response.status_code == 200:
             data = response.json()
@@ -27,11 +41,11 @@ def test_health():
         print(f"❌ Error: {e}")
         return False
 
-def test_api_test():
-    """Test the /api/test endpoint"""
+def test_api_test(pending):
+    """Test the /api/test endpoint, given its in-flight request"""
     print("\n🔍 Testing /api/test endpoint...")
     try:
-        response = requests.get(f"{API_BASE_URL}/api/test")
+        response = pending.result()
         print(f"Status Code: {response.status_code}")
         if response.status_code == 200:
             data = response.json()
@@ -45,14 +59,11 @@ def test_api_test():
         print(f"❌ Error: {e}")
         return False
 
-def test_summarize_unauthorized():
-    """Test that summarize endpoint requires authentication"""
+def test_summarize_unauthorized(pending):
+    """Test that summarize endpoint requires authentication, given its in-flight request"""
     print("\n🔍 Testing /api/summarize (should require auth)...")
     try:
-        response = requests.post(
-            f"{API_BASE_URL}/api/summarize",
-            json={"url": "https://example.com", "text": "Test content"}
-        )
+        response = pending.result()
         print(f"Status Code: {response.status_code}")
         if response.status_code == 401:
             print("✅ Correctly requires authentication")
@@ -70,10 +81,20 @@ def main():
     
     results = []
     
-    # Run tests
-    results.append(("Health Check", test_health()))
-    results.append(("API Test", test_api_test()))
-    results.append(("Auth Check", test_summarize_unauthorized()))
+    # The probes are independent - send them all at once, then check each response in order
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        health_request = executor.submit(http_session.get, f"{API_BASE_URL}/health")
+        api_test_request = executor.submit(http_session.get, f"{API_BASE_URL}/api/test")
+        summarize_request = executor.submit(
+            http_session.post,
+            f"{API_BASE_URL}/api/summarize",
+            json={"url": "https://example.com", "text": "Test content"}
+        )
+        
+        # Run tests
+        results.append(("Health Check", test_health(health_request)))
+        results.append(("API Test", test_api_test(api_test_request)))
+        results.append(("Auth Check", test_summarize_unauthorized(summarize_request)))
     
     # Summary
     print("\n" + "=" * 50)